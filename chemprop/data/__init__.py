@@ -1,3 +1,3 @@
-from .data import MoleculeDatapoint, MoleculeDataset
+from .data import MoleculeBatch, MoleculeDatapoint, MoleculeDataset, MoleculeSampler
 from .scaffold import scaffold_to_smiles
 from .scaler import StandardScaler
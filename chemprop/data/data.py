@@ -3,7 +3,9 @@ import random
 from typing import Callable, List, Union
 
 import numpy as np
+import torch
 from torch.utils.data.dataset import Dataset
+from torch.utils.data.sampler import Sampler
 from rdkit import Chem
 
 from .scaler import StandardScaler
@@ -258,3 +260,115 @@ class MoleculeDataset(Dataset):
         :return: A MoleculeDatapoint if an int is provided or a list of MoleculeDatapoints if a slice is provided.
         """
         return self.data[item]
+
+
+class MoleculeBatch(MoleculeDataset):
+    """A MoleculeBatch is a collated batch of MoleculeDatapoints with ready-made training tensors."""
+
+    def __init__(self, data: List[MoleculeDatapoint]):
+        """
+        Initializes a MoleculeBatch, building the mask/target/weight tensors at collate
+        time so DataLoader workers take this work off the training loop.
+
+        :param data: A list of MoleculeDatapoints.
+        """
+        super(MoleculeBatch, self).__init__(data)
+
+        target_array = np.array(self.targets(), dtype=object)
+        weight_array = np.array(self.weights(), dtype=object)
+        self.mask = torch.from_numpy((target_array != None).astype(np.float32))
+        self.target_tensor = torch.from_numpy(np.where(target_array == None, 0, target_array).astype(np.float32))
+        self.weight_tensor = torch.from_numpy(np.where(weight_array == None, 0, weight_array).astype(np.float32))
+
+    def pin_memory(self):
+        """Pins the batch's tensors so they can be copied to the GPU asynchronously."""
+        self.mask = self.mask.pin_memory()
+        self.target_tensor = self.target_tensor.pin_memory()
+        self.weight_tensor = self.weight_tensor.pin_memory()
+
+        return self
+
+
+class MoleculeSampler(Sampler):
+    """A MoleculeSampler visits a MoleculeDataset in a fresh random order each epoch."""
+
+    def __init__(self, dataset: MoleculeDataset, batch_size: int, class_balance: bool = False):
+        """
+        Initializes a MoleculeSampler.
+
+        :param dataset: A MoleculeDataset.
+        :param batch_size: Batch size (used to lay out class-balanced batches).
+        :param class_balance: Whether to order indices so that each batch contains
+        an equal number of positives and negatives.
+        """
+        super(MoleculeSampler, self).__init__(dataset)
+        self.dataset = dataset
+        self.batch_size = batch_size
+        self.class_balance = class_balance
+
+        if self.class_balance:
+            targets = np.array([d.targets[0] for d in dataset.data])
+            self.num_pos = int(np.sum(targets == 1))
+            self.num_neg = int(np.sum(targets == 0))
+
+    def _indices(self) -> np.ndarray:
+        permutation = np.random.permutation(len(self.dataset))
+
+        if not self.class_balance:
+            return permutation
+
+        # Order batches so that each has an equal number of positives and negatives
+        # (will leave out a different random sample of negatives each epoch).
+        # Only index arrays are built here; the datapoints themselves are never copied.
+        assert len(self.dataset[0].targets) == 1  # only works for single class classification
+        targets = np.array([self.dataset[int(i)].targets[0] for i in permutation])
+        pos = permutation[targets == 1]
+        neg = permutation[targets == 0]
+
+        new_order = []
+        pos_size = self.batch_size // 2
+        pos_index = neg_index = 0
+        while True:
+            new_pos = pos[pos_index:pos_index + pos_size]
+            new_neg = neg[neg_index:neg_index + self.batch_size - len(new_pos)]
+
+            if len(new_pos) == 0 or len(new_neg) == 0:
+                break
+
+            if len(new_pos) + len(new_neg) < self.batch_size:
+                new_pos = pos[pos_index:pos_index + self.batch_size - len(new_neg)]
+
+            new_order.append(new_pos)
+            new_order.append(new_neg)
+
+            pos_index += len(new_pos)
+            neg_index += len(new_neg)
+
+        return np.concatenate(new_order) if len(new_order) > 0 else np.array([], dtype=int)
+
+    def __iter__(self):
+        return iter(self._indices().tolist())
+
+    def __len__(self) -> int:
+        if not self.class_balance:
+            return len(self.dataset)
+
+        # Mirrors the batch layout in _indices, which stops once either class runs out
+        length = 0
+        pos_size = self.batch_size // 2
+        pos_left, neg_left = self.num_pos, self.num_neg
+        while True:
+            new_pos = min(pos_left, pos_size)
+            new_neg = min(neg_left, self.batch_size - new_pos)
+
+            if new_pos == 0 or new_neg == 0:
+                break
+
+            if new_pos + new_neg < self.batch_size:
+                new_pos = min(pos_left, self.batch_size - new_neg)
+
+            length += new_pos + new_neg
+            pos_left -= new_pos
+            neg_left -= new_neg
+
+        return length
@@ -143,6 +143,9 @@ def add_train_args(parser: ArgumentParser):
                         help='Number of epochs to run')
     parser.add_argument('--batch_size', type=int, default=50,
                         help='Batch size')
+    parser.add_argument('--num_workers', type=int, default=0,
+                        help='Number of worker processes used to batch data during training'
+                             '(0 collates batches on the main process)')
     parser.add_argument('--warmup_epochs', type=float, default=2.0,
                         help='Number of epochs during which learning rate increases linearly from'
                              'init_lr to max_lr. Afterwards, learning rate decreases exponentially'
@@ -3,7 +3,7 @@ from typing import Callable, List
 import torch
 import torch.nn as nn
 import math
-import numpy
+import numpy as np
 from .predict import predict
 from chemprop.data import MoleculeDataset, StandardScaler
 
@@ -31,15 +31,20 @@ def evaluate_predictions(preds:   List[List[float]],
     if len(preds) == 0:
         return [float('nan')] * num_tasks
 
-    # Filter out empty targets
+    # Filter out empty targets with a vectorized validity mask
     # valid_preds and valid_targets have shape (num_tasks, data_size)
-    valid_preds = [[] for _ in range(num_tasks)]
-    valid_targets = [[] for _ in range(num_tasks)]
-    for i in range(num_tasks):
-        for j in range(len(preds)):
-            if targets[j][i] is not None:  # Skip those without targets
-                valid_preds[i].append(preds[j][i])
-                valid_targets[i].append(targets[j][i])
+    preds_array = np.asarray(preds, dtype=np.float32)
+    target_array = np.array(targets, dtype=object)
+    weight_array = np.array(weights, dtype=object)
+    valid_mask = target_array != None
+    valid_preds = [preds_array[valid_mask[:, i], i] for i in range(num_tasks)]
+    valid_targets = [target_array[valid_mask[:, i], i].astype(np.float32) for i in range(num_tasks)]
+
+    # Tensors for the weighted rmse below, built once outside the task loop
+    mask = torch.from_numpy(valid_mask.astype(np.float32))
+    preds = torch.from_numpy(preds_array)
+    targs = torch.from_numpy(np.where(valid_mask, target_array, 0).astype(np.float32))
+    weigs = torch.from_numpy(np.where(weight_array == None, 0, weight_array).astype(np.float32))
 
     # Compute metric
     results = []
@@ -47,10 +52,10 @@ def evaluate_predictions(preds:   List[List[float]],
         # # Skip if all targets or preds are identical, otherwise we'll crash during classification
         if dataset_type == 'classification':
             nan = False
-            if all(target == 0 for target in valid_targets[i]) or all(target == 1 for target in valid_targets[i]):
+            if np.all(valid_targets[i] == 0) or np.all(valid_targets[i] == 1):
                 nan = True
                 info('Warning: Found a task with targets all 0s or all 1s')
-            if all(pred == 0 for pred in valid_preds[i]) or all(pred == 1 for pred in valid_preds[i]):
+            if np.all(valid_preds[i] == 0) or np.all(valid_preds[i] == 1):
                 nan = True
                 info('Warning: Found a task with predictions all 0s or all 1s')
 
@@ -61,10 +66,6 @@ def evaluate_predictions(preds:   List[List[float]],
         if len(valid_targets[i]) == 0:
             continue
 
-        mask = torch.Tensor([[x is not None for x in tb] for tb in targets])
-        preds = torch.Tensor([[0 if x is None else x for x in tb] for tb in preds])
-        targs = torch.Tensor([[0 if x is None else x for x in tb] for tb in targets])
-        weigs = torch.Tensor([[0 if x is None else x for x in tb] for tb in weights])
 #        loss = math.sqrt( torch.sum((preds - targs) ** 2) / len(targets))
         loss = math.sqrt( torch.sum(( (preds - targs) ** 2) * weigs * mask) / len(targets) )
         results.append(loss)
@@ -70,7 +70,7 @@ def make_predictions(args: Namespace, smiles: List[str] = None) -> List[Optional
             batch_size=args.batch_size,
             scaler=scaler
         )
-        sum_preds += np.array(model_preds)
+        sum_preds += model_preds
 
     # Ensemble predictions
     avg_preds = sum_preds / len(args.checkpoint_paths)
@@ -1,5 +1,4 @@
-from typing import List
-
+import numpy as np
 import torch
 import torch.nn as nn
 from tqdm import trange
@@ -11,7 +10,7 @@ def predict(model: nn.Module,
             data: MoleculeDataset,
             batch_size: int,
             disable_progress_bar: bool = False,
-            scaler: StandardScaler = None) -> List[List[float]]:
+            scaler: StandardScaler = None) -> np.ndarray:
     """
     Makes predictions on a dataset using an ensemble of models.
 
@@ -20,8 +19,7 @@ def predict(model: nn.Module,
     :param batch_size: Batch size.
     :param disable_progress_bar: Whether to disable the progress bar.
     :param scaler: A StandardScaler object fit on the training targets.
-    :return: A list of lists of predictions. The outer list is examples
-    while the inner list is tasks.
+    :return: A numpy array of predictions of shape (data_size, num_tasks).
     """
     model.eval()
 
@@ -46,7 +44,9 @@ def predict(model: nn.Module,
             batch_preds = scaler.inverse_transform(batch_preds)
 
         # Collect vectors
-        batch_preds = batch_preds.tolist()
-        preds.extend(batch_preds)
+        preds.append(batch_preds)
+
+    if len(preds) == 0:
+        return np.zeros((0, 0))
 
-    return preds
+    return np.concatenate(preds)
@@ -1,5 +1,6 @@
 from argparse import Namespace
 import csv
+from concurrent.futures import ThreadPoolExecutor
 from logging import Logger
 import os
 from pprint import pformat
@@ -8,6 +9,8 @@ from typing import List
 import numpy as np
 from tensorboardX import SummaryWriter
 import torch
+import torch.distributed as dist
+from torch.utils.data import DataLoader
 from tqdm import trange
 import pickle
 from torch.optim.lr_scheduler import ExponentialLR
@@ -15,7 +18,7 @@ from torch.optim.lr_scheduler import ExponentialLR
 from .evaluate import evaluate, evaluate_predictions
 from .predict import predict
 from .train import train
-from chemprop.data import StandardScaler
+from chemprop.data import MoleculeBatch, MoleculeSampler, StandardScaler
 from chemprop.data.utils import get_class_sizes, get_data, get_task_names, split_data
 from chemprop.models import build_model
 from chemprop.nn_utils import param_count
@@ -40,6 +43,22 @@ def run_training(args: Namespace, logger: Logger = None) -> List[float]:
     if args.gpu is not None:
         torch.cuda.set_device(args.gpu)
 
+    # When launched with torchrun across multiple GPUs, shard ensemble members across ranks
+    # (members train independently, so no gradient synchronization is needed).
+    # The process group is initialized once per process and reused across folds,
+    # since cross validation and grid search call run_training repeatedly.
+    if args.cuda and int(os.environ.get('WORLD_SIZE', 1)) > 1:
+        if not dist.is_initialized():
+            dist.init_process_group(backend='nccl')
+        rank, world_size = dist.get_rank(), dist.get_world_size()
+        torch.cuda.set_device(rank % torch.cuda.device_count())
+    else:
+        rank, world_size = 0, 1
+
+    # Batch shapes recur across epochs, so let cuDNN pick the fastest algorithms
+    if args.cuda:
+        torch.backends.cudnn.benchmark = True
+
     # Print command line
     debug('Command line')
     debug(args.command_line)
@@ -80,36 +99,39 @@ def run_training(args: Namespace, logger: Logger = None) -> List[float]:
                   f'{", ".join(f"{cls}: {size * 100:.2f}%" for cls, size in enumerate(task_class_sizes))}')
 
     if args.save_smiles_splits:
-        with open(args.data_path, 'r') as f:
-            reader = csv.reader(f)
-            header = next(reader)
-
-            lines_by_smiles = {}
-            indices_by_smiles = {}
-            for i, line in enumerate(reader):
-                smiles = line[0]
-                lines_by_smiles[smiles] = line
-                indices_by_smiles[smiles] = i
-
-        all_split_indices = []
-        for dataset, name in [(train_data, 'train'), (val_data, 'val'), (test_data, 'test')]:
-            with open(os.path.join(args.save_dir, name + '_smiles.csv'), 'w') as f:
-                writer = csv.writer(f)
-                writer.writerow(['smiles'])
-                for smiles in dataset.smiles():
-                    writer.writerow([smiles])
-            with open(os.path.join(args.save_dir, name + '_full.csv'), 'w') as f:
-                writer = csv.writer(f)
-                writer.writerow(header)
-                for smiles in dataset.smiles():
-                    writer.writerow(lines_by_smiles[smiles])
-            split_indices = []
-            for smiles in dataset.smiles():
-                split_indices.append(indices_by_smiles[smiles])
-                split_indices = sorted(split_indices)
-            all_split_indices.append(split_indices)
-        with open(os.path.join(args.save_dir, 'split_indices.pckl'), 'wb') as f:
-            pickle.dump(all_split_indices, f)
+        # Only rank 0 writes the split files; all ranks share the same paths
+        if rank == 0:
+            with open(args.data_path, 'r') as f:
+                reader = csv.reader(f)
+                header = next(reader)
+
+                lines_by_smiles = {}
+                indices_by_smiles = {}
+                for i, line in enumerate(reader):
+                    smiles = line[0]
+                    lines_by_smiles[smiles] = line
+                    indices_by_smiles[smiles] = i
+
+            all_split_indices = []
+            for dataset, name in [(train_data, 'train'), (val_data, 'val'), (test_data, 'test')]:
+                split_smiles = dataset.smiles()
+                with open(os.path.join(args.save_dir, name + '_smiles.csv'), 'w') as f:
+                    writer = csv.writer(f)
+                    writer.writerow(['smiles'])
+                    for smiles in split_smiles:
+                        writer.writerow([smiles])
+                with open(os.path.join(args.save_dir, name + '_full.csv'), 'w') as f:
+                    writer = csv.writer(f)
+                    writer.writerow(header)
+                    for smiles in split_smiles:
+                        writer.writerow(lines_by_smiles[smiles])
+                split_indices = sorted(indices_by_smiles[smiles] for smiles in split_smiles)
+                all_split_indices.append(split_indices)
+            with open(os.path.join(args.save_dir, 'split_indices.pckl'), 'wb') as f:
+                pickle.dump(all_split_indices, f)
+
+        if world_size > 1:
+            dist.barrier()
 
     if args.features_scaling:
         features_scaler = train_data.normalize_features(replace_nan_token=0)
@@ -137,6 +159,21 @@ def run_training(args: Namespace, logger: Logger = None) -> List[float]:
     loss_func = get_loss_func(args)
     metric_func = get_metric_func(metric=args.metric)
 
+    # Build the training data loader once so its worker pool and prefetching persist
+    # across epochs and ensemble members; the sampler reshuffles (and class-balances)
+    # the index order each epoch, collation builds each batch's training tensors, and
+    # drop_last skips a small final batch for stability
+    train_data_loader = DataLoader(
+        train_data,
+        batch_size=args.batch_size,
+        sampler=MoleculeSampler(train_data, batch_size=args.batch_size, class_balance=args.class_balance),
+        collate_fn=MoleculeBatch,
+        num_workers=args.num_workers,
+        pin_memory=args.cuda,
+        persistent_workers=args.num_workers > 0,
+        drop_last=True
+    )
+
     # Set up test set evaluation
     test_smiles, test_targets, test_weights = test_data.smiles(), test_data.targets(), test_data.weights()
     if args.dataset_type == 'multiclass':
@@ -144,8 +181,11 @@ def run_training(args: Namespace, logger: Logger = None) -> List[float]:
     else:
         sum_test_preds = np.zeros((len(test_smiles), args.num_tasks))
 
-    # Train ensemble of models
-    for model_idx in range(args.ensemble_size):
+    # Checkpoint writes run on this executor so they can overlap test-set prediction
+    save_executor = ThreadPoolExecutor(max_workers=1)
+
+    # Train ensemble of models (each rank trains every world_size-th member)
+    for model_idx in range(rank, args.ensemble_size, world_size):
         # Tensorboard writer
         save_dir = os.path.join(args.save_dir, f'model_{model_idx}')
         makedirs(save_dir)
@@ -167,8 +207,11 @@ def run_training(args: Namespace, logger: Logger = None) -> List[float]:
             debug('Moving model to cuda')
             model = model.cuda()
 
-        # Ensure that model is saved in correct location for evaluation if 0 epochs
-        save_checkpoint(os.path.join(save_dir, 'model.pt'), model, scaler, features_scaler, args)
+        # Compile the forward pass for GPU runs where supported (graph breaks around
+        # the featurization leave the tensor work to the compiled graphs); CPU runs
+        # are typically too small to amortize the compile time
+        if args.cuda and hasattr(torch, 'compile'):
+            model = torch.compile(model)
 
         # Optimizers
         optimizer = build_optimizer(model, args)
@@ -177,14 +220,16 @@ def run_training(args: Namespace, logger: Logger = None) -> List[float]:
         scheduler = build_lr_scheduler(optimizer, args)
 
         # Run training
+        # The best weights are tracked in memory and only written to disk once per model
         best_score = float('inf') if args.minimize_score else -float('inf')
+        best_state_dict = None
         best_epoch, n_iter = 0, 0
         for epoch in trange(args.epochs):
             debug(f'Epoch {epoch}')
 
             n_iter = train(
                 model=model,
-                data=train_data,
+                data_loader=train_data_loader,
                 loss_func=loss_func,
                 optimizer=optimizer,
                 scheduler=scheduler,
@@ -218,16 +263,23 @@ def run_training(args: Namespace, logger: Logger = None) -> List[float]:
                     debug(f'Validation {task_name} {args.metric} = {val_score:.6f}')
                     writer.add_scalar(f'validation_{task_name}_{args.metric}', val_score, n_iter)
 
-            # Save model checkpoint if improved validation score
+            # Snapshot model weights if improved validation score
             if args.minimize_score and avg_val_score < best_score or \
                     not args.minimize_score and avg_val_score > best_score:
                 best_score, best_epoch = avg_val_score, epoch
-                save_checkpoint(os.path.join(save_dir, 'model.pt'), model, scaler, features_scaler, args)        
+                best_state_dict = {name: param.cpu().clone() for name, param in
+                                   getattr(model, '_orig_mod', model).state_dict().items()}
 
-        # Evaluate on test set using model with best validation score
+        # Restore the weights with the best validation score (initial weights if 0 epochs)
         info(f'Model {model_idx} best validation {args.metric} = {best_score:.6f} on epoch {best_epoch}')
-        model = load_checkpoint(os.path.join(save_dir, 'model.pt'), cuda=args.cuda, logger=logger)
-        
+        if best_state_dict is not None:
+            getattr(model, '_orig_mod', model).load_state_dict(best_state_dict)
+
+        # Write the single checkpoint in the background while the test set is evaluated
+        save_future = save_executor.submit(
+            save_checkpoint, os.path.join(save_dir, 'model.pt'), model, scaler, features_scaler, args
+        )
+
         test_preds = predict(
             model=model,
             data=test_data,
@@ -245,8 +297,10 @@ def run_training(args: Namespace, logger: Logger = None) -> List[float]:
             logger=logger
         )
 
+        save_future.result()  # re-raises any failure from the checkpoint write
+
         if len(test_preds) != 0:
-            sum_test_preds += np.array(test_preds)
+            sum_test_preds += test_preds
 
         # Average test score
         avg_test_score = np.nanmean(test_scores)
@@ -259,7 +313,15 @@ def run_training(args: Namespace, logger: Logger = None) -> List[float]:
                 info(f'Model {model_idx} test {task_name} {args.metric} = {test_score:.6f}')
                 writer.add_scalar(f'test_{task_name}_{args.metric}', test_score, n_iter)
 
+    save_executor.shutdown()
+
     # Evaluate ensemble on test set
+    if world_size > 1:
+        # Combine the per-rank prediction sums so every rank sees the full ensemble
+        sum_test_preds_tensor = torch.from_numpy(sum_test_preds).cuda()
+        dist.all_reduce(sum_test_preds_tensor)
+        sum_test_preds = sum_test_preds_tensor.cpu().numpy()
+
     avg_test_preds = (sum_test_preds / args.ensemble_size).tolist()
 
     ensemble_scores = evaluate_predictions(
@@ -276,7 +338,8 @@ def run_training(args: Namespace, logger: Logger = None) -> List[float]:
     # Average ensemble score
     avg_ensemble_test_score = np.nanmean(ensemble_scores)
     info(f'Ensemble test {args.metric} = {avg_ensemble_test_score:.6f}')
-    writer.add_scalar(f'ensemble_test_{args.metric}', avg_ensemble_test_score, 0)
+    if rank == 0:
+        writer.add_scalar(f'ensemble_test_{args.metric}', avg_ensemble_test_score, 0)
 
     # Individual ensemble scores
     if args.show_individual_scores:
@@ -46,6 +46,9 @@ def save_checkpoint(path: str,
     :param args: Arguments namespace.
     :param path: Path where checkpoint will be saved.
     """
+    # Unwrap a torch.compile'd model so the checkpoint keys match a freshly built model
+    model = getattr(model, '_orig_mod', model)
+
     state = {
         'args': args,
         'state_dict': model.state_dict(),
@@ -266,7 +269,8 @@ def build_optimizer(model: nn.Module, args: Namespace) -> Optimizer:
     """
     params = [{'params': model.parameters(), 'lr': args.init_lr, 'weight_decay': 0}]
 
-    return Adam(params)
+    # foreach batches the per-parameter update math into multi-tensor kernels
+    return Adam(params, foreach=True)
 
 
 def build_lr_scheduler(optimizer: Optimizer, args: Namespace, total_epochs: List[int] = None) -> _LRScheduler:
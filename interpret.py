@@ -36,7 +36,8 @@ class ChempropModel():
         if self.train_args.features_scaling:
             test_data.normalize_features(self.features_scaler)
 
-        sum_preds = [] 
+        # Keep a running sum so only one model's predictions are held at a time
+        sum_preds = None
         for model in self.checkpoints:
             model_preds = predict(
                 model=model,
@@ -45,10 +46,12 @@ class ChempropModel():
                 scaler=self.scaler,
                 disable_progress_bar=True
             )
-            sum_preds.append(np.array(model_preds))
+            if sum_preds is None:
+                sum_preds = model_preds
+            else:
+                sum_preds += model_preds
 
         # Ensemble predictions
-        sum_preds = sum(sum_preds)
         avg_preds = sum_preds / len(self.checkpoints)
         return avg_preds
 
@@ -22,15 +22,15 @@ def cal_pccs(x, y):
     :param n: The number of elements in x
     :return: pccs
     """
-    x = np.array(x, dtype=float)
-    y = np.array(y, dtype=float)
- 
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+
     n = len(x)
-    sum_xy = np.sum(np.sum(x*y))
-    sum_x = np.sum(np.sum(x))
-    sum_y = np.sum(np.sum(y))
-    sum_x2 = np.sum(np.sum(x*x))
-    sum_y2 = np.sum(np.sum(y*y))
+    sum_xy = np.sum(x*y)
+    sum_x = np.sum(x)
+    sum_y = np.sum(y)
+    sum_x2 = np.sum(x*x)
+    sum_y2 = np.sum(y*y)
     pcc = (n*sum_xy-sum_x*sum_y)/np.sqrt((n*sum_x2-sum_x*sum_x)*(n*sum_y2-sum_y*sum_y))
     return pcc
 
@@ -38,7 +38,7 @@ def cal_rank(x, y):
     n = len(x)
     f=n*(n**2-1)
 #    print (f)
-    d = np.array(x)-np.array(y)
+    d = np.asarray(x)-np.asarray(y)
 #    print (d)
 #    print (d**2)
     d2 = np.sum(d**2)
@@ -55,34 +55,25 @@ ypred = pd.read_csv(file)
 ytrue.head()
 ypred.head()
 
-vtrue=[]
-vpred=[]
-for idx, item in ytrue.iterrows():
-    smi = item.smiles
-    logS = item.logS
-#    print (smi, logS)
-    vtrue.append(logS)
-
-for idx, item in ypred.iterrows():
-    smi = item.smiles
-    logS = item.logS
-#    print (smi, logS)
-    vpred.append(logS)
-
+vtrue = ytrue['logS'].to_numpy(dtype=float)
+vpred = ypred['logS'].to_numpy(dtype=float)
 
 print (vtrue)
 print (vpred)
 
 
+# Compute the error vector once and derive MSE/RMSE/MAE from it
+err = vtrue - vpred
+mse = np.mean(err ** 2)
 
 print ("mean_squared_error (MSE)")
-print(mean_squared_error(vtrue, vpred))
+print(mse)
 
 print ("RMSE")
-print('All rmseResult', np.sqrt(mean_squared_error(vtrue, vpred)))
+print('All rmseResult', np.sqrt(mse))
 
 print ("mean_absolute_error (MAE)")
-print('All maeResult', np.mean(np.abs(np.array(vtrue)-np.array(vpred))))
+print('All maeResult', np.mean(np.abs(err)))
 
 print ("r2_score")
 print (r2_score(vtrue, vpred))
@@ -4,20 +4,58 @@ from argparse import ArgumentParser
 import os
 import sys
 
-from itertools import product
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from itertools import repeat
 from typing import List
 
 import math
 import numpy as np
-from rdkit import Chem
-from rdkit import DataStructs
-from rdkit.Chem import AllChem
 from tqdm import tqdm
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
 
 from chemprop.data import scaffold_to_smiles
 from chemprop.data.utils import get_data
+from chemprop.features import get_features_generator
+
+
+# Number of set bits in each possible byte, for counting bits of packed fingerprints
+POPCOUNT_TABLE = np.array([bin(byte).count('1') for byte in range(256)], dtype=np.uint16)
+
+
+@lru_cache(maxsize=None)
+def _packed_morgan_fingerprint(smiles: str, radius: int) -> np.ndarray:
+    """
+    Computes the bit-packed Morgan fingerprint of a smiles string, memoized on the smiles.
+
+    :param smiles: A smiles string.
+    :param radius: The radius of the morgan fingerprint.
+    :return: A 1D numpy uint8 array of length num_bits / 8 with the fingerprint packed into bytes.
+    """
+    morgan_fingerprint = get_features_generator('morgan')
+
+    return np.packbits(morgan_fingerprint(smiles, radius=radius).astype(np.uint8))
+
+
+def _packed_morgan_fingerprints(smiles_list: List[str], radius: int) -> np.ndarray:
+    """
+    Computes bit-packed Morgan fingerprints for a list of smiles strings.
+
+    Since sampling draws smiles with replacement, each unique smiles is parsed
+    and fingerprinted only once, with the work spread across a process pool.
+
+    :param smiles_list: A list of smiles strings.
+    :param radius: The radius of the morgan fingerprints.
+    :return: A 2D numpy uint8 array of shape (num_molecules, num_bits / 8) with each fingerprint packed into bytes.
+    """
+    unique_smiles = list(dict.fromkeys(smiles_list))
+    with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+        fps = list(tqdm(executor.map(_packed_morgan_fingerprint, unique_smiles, repeat(radius), chunksize=64),
+                        total=len(unique_smiles)))
+    fp_by_smiles = dict(zip(unique_smiles, fps))
+
+    return np.stack([fp_by_smiles[smiles] for smiles in smiles_list])
 
 
 def scaffold_similarity(smiles_1: List[str], smiles_2: List[str]):
@@ -81,13 +119,14 @@ def scaffold_similarity(smiles_1: List[str], smiles_2: List[str]):
     print(f'Number of molecules in dataset 2 with scaffolds in dataset 1 = {len(smiles_in_2_with_scaffold_in_1):,}')
     print(f'Percent of molecules in dataset 2 with scaffolds in dataset 1 = {100 * len(smiles_in_2_with_scaffold_in_1) / len(smiles_2):.2f}%')
     print()
+    percentiles = np.arange(0, 101, 10)
     print(f'Average number of molecules per scaffold in dataset 1 = {np.mean(sizes_1):.4f} +/- {np.std(sizes_1):.4f}')
     print('Percentiles for molecules per scaffold in dataset 1')
-    print(' | '.join([f'{i}% = {int(np.percentile(sizes_1, i)):,}' for i in range(0, 101, 10)]))
+    print(' | '.join([f'{i}% = {int(p):,}' for i, p in zip(percentiles, np.percentile(sizes_1, percentiles))]))
     print()
     print(f'Average number of molecules per scaffold in dataset 2 = {np.mean(sizes_2):.4f} +/- {np.std(sizes_2):.4f}')
     print('Percentiles for molecules per scaffold in dataset 2')
-    print(' | '.join([f'{i}% = {int(np.percentile(sizes_2, i)):,}' for i in range(0, 101, 10)]))
+    print(' | '.join([f'{i}% = {int(p):,}' for i, p in zip(percentiles, np.percentile(sizes_2, percentiles))]))
 
 
 def morgan_similarity(smiles_1: List[str], smiles_2: List[str], radius: int, sample_rate: float):
@@ -99,27 +138,32 @@ def morgan_similarity(smiles_1: List[str], smiles_2: List[str], radius: int, sam
     :param radius: The radius of the morgan fingerprints.
     :param sample_rate: Rate at which to sample pairs of molecules for Morgan similarity (to reduce time).
     """
-    # Compute similarities
-    similarities = []
     num_pairs = len(smiles_1) * len(smiles_2)
 
     # Sample to improve speed
     if sample_rate < 1.0:
         sample_num_pairs = sample_rate * num_pairs
         sample_size = math.ceil(math.sqrt(sample_num_pairs))
-        sample_smiles_1 = np.random.choice(smiles_1, size=sample_size, replace=True)
-        sample_smiles_2 = np.random.choice(smiles_2, size=sample_size, replace=True)
+        # tolist() so the sampled entries are plain str, as the features generator expects
+        sample_smiles_1 = np.random.choice(smiles_1, size=sample_size, replace=True).tolist()
+        sample_smiles_2 = np.random.choice(smiles_2, size=sample_size, replace=True).tolist()
     else:
         sample_smiles_1, sample_smiles_2 = smiles_1, smiles_2
 
-    sample_num_pairs = len(sample_smiles_1) * len(sample_smiles_2)
+    # Compute each fingerprint once and pack into (num_molecules, num_bits / 8) bit matrices
+    packed_1 = _packed_morgan_fingerprints(sample_smiles_1, radius)
+    packed_2 = _packed_morgan_fingerprints(sample_smiles_2, radius)
 
-    for smile_1, smile_2 in tqdm(product(sample_smiles_1, sample_smiles_2), total=sample_num_pairs):
-        mol_1, mol_2 = Chem.MolFromSmiles(smile_1), Chem.MolFromSmiles(smile_2)
-        fp_1, fp_2 = AllChem.GetMorganFingerprint(mol_1, radius), AllChem.GetMorganFingerprint(mol_2, radius)
-        similarity = DataStructs.TanimotoSimilarity(fp_1, fp_2)
-        similarities.append(similarity)
-    similarities = np.array(similarities)
+    # All-pairs Tanimoto on the packed bits: popcount(a & b) / popcount(a | b).
+    # Broadcasting one row of set 1 against all of set 2 keeps memory bounded.
+    bit_counts_1 = POPCOUNT_TABLE[packed_1].sum(axis=1)
+    bit_counts_2 = POPCOUNT_TABLE[packed_2].sum(axis=1)
+    similarities = []
+    for packed, bit_count in zip(tqdm(packed_1), bit_counts_1):
+        intersection = POPCOUNT_TABLE[packed & packed_2].sum(axis=1)
+        union = bit_count + bit_counts_2 - intersection
+        similarities.append(intersection / np.maximum(union, 1))
+    similarities = np.concatenate(similarities)
 
     # Print results
     print()
@@ -127,8 +171,9 @@ def morgan_similarity(smiles_1: List[str], smiles_2: List[str], radius: int, sam
     print(f'Minimum dice similarity = {np.min(similarities):.4f}')
     print(f'Maximum dice similarity = {np.max(similarities):.4f}')
     print()
+    percentiles = np.arange(0, 101, 10)
     print('Percentiles for dice similarity')
-    print(' | '.join([f'{i}% = {np.percentile(similarities, i):.4f}' for i in range(0, 101, 10)]))
+    print(' | '.join([f'{i}% = {p:.4f}' for i, p in zip(percentiles, np.percentile(similarities, percentiles))]))
 
 
 if __name__ == '__main__':